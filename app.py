@@ -1,763 +1,1167 @@
-from flask import Flask, request, redirect, url_for, session, render_template_string, g
-from datetime import datetime
-import os
-import urllib.parse
-
-import psycopg2
-from psycopg2.extras import RealDictCursor
-
-app = Flask(__name__)
-app.secret_key = os.environ.get("SECRET_KEY", "degistir-bunu-123")
-
-ADMIN_USER = "admin"
-
-def get_admin_pass() -> str:
-    return os.environ.get("ADMIN_PASS", "")
-
-def get_whatsapp_number() -> str:
-    return os.environ.get("WHATSAPP_NUMBER", "")
-
-def get_database_url() -> str:
-    return os.environ.get("DATABASE_URL", "")
-
-# --- küçük yardımcılar ---
-def esc(s: str) -> str:
-    return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
-
-def safe_int(value, default=0, minv=None, maxv=None):
-    try:
-        v = int(str(value).strip())
-    except Exception:
-        v = default
-    if minv is not None:
-        v = max(minv, v)
-    if maxv is not None:
-        v = min(maxv, v)
-    return v
-
-# --- PostgreSQL ---
-def get_db():
-    if "db" not in g:
-        dsn = get_database_url()
-        if not dsn:
-            raise RuntimeError("DATABASE_URL environment variable is not set.")
-        # Render/PG genelde SSL ister; URL içinde sslmode yoksa ekleyelim
-        if "sslmode=" not in dsn:
-            joiner = "&" if "?" in dsn else "?"
-            dsn = dsn + f"{joiner}sslmode=require"
-        g.db = psycopg2.connect(dsn)
-    return g.db
-
-@app.teardown_appcontext
-def close_db(_err):
-    db = g.pop("db", None)
-    if db is not None:
-        db.close()
-
-def init_db():
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                material TEXT NOT NULL,
-                price INTEGER NOT NULL DEFAULT 0,
-                stock INTEGER NOT NULL DEFAULT 0,
-                lead_time_days INTEGER NOT NULL DEFAULT 1,
-                photo_url TEXT,
-                stl_url TEXT,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW()
-            );
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                email TEXT NOT NULL,
-                message TEXT NOT NULL,
-                is_read BOOLEAN NOT NULL DEFAULT FALSE,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW()
-            );
-        """)
-    db.commit()
-
-def seed_products_if_empty():
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM products;")
-        n = cur.fetchone()[0]
-        if n == 0:
-            cur.execute("""
-                INSERT INTO products(name, category, material, price, stock, lead_time_days, photo_url, stl_url)
-                VALUES
-                  (%s,%s,%s,%s,%s,%s,%s,%s),
-                  (%s,%s,%s,%s,%s,%s,%s,%s),
-                  (%s,%s,%s,%s,%s,%s,%s,%s);
-            """, (
-                "PS5 DualSense Stand (Ters Slotlu)", "Aksesuar", "PLA", 249, 15, 2, "", "",
-                "Kablo Düzenleyici Klips Seti (10'lu)", "Organizasyon", "PETG", 129, 40, 1, "", "",
-                "Masa Üstü Telefon Standı (Ayarlı)", "Stand", "PLA", 159, 25, 1, "", "",
-            ))
-    db.commit()
-
-def fetch_products(q="", cat="", mat=""):
-    q = (q or "").strip().lower()
-    cat = (cat or "").strip()
-    mat = (mat or "").strip()
-
-    sql = "SELECT * FROM products WHERE 1=1"
-    args = []
-
-    if q:
-        sql += " AND LOWER(name) LIKE %s"
-        args.append(f"%{q}%")
-    if cat:
-        sql += " AND category = %s"
-        args.append(cat)
-    if mat:
-        sql += " AND material = %s"
-        args.append(mat)
-
-    sql += " ORDER BY id DESC"
-
-    db = get_db()
-    with db.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(sql, args)
-        return cur.fetchall()
-
-def fetch_product(pid: int):
-    db = get_db()
-    with db.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("SELECT * FROM products WHERE id=%s", (pid,))
-        return cur.fetchone()
-
-def distinct_values(col: str):
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute(f"SELECT DISTINCT {col} FROM products ORDER BY {col};")
-        vals = [r[0] for r in cur.fetchall()]
-        return [v for v in vals if (v or "").strip()]
-
-def fetch_messages():
-    db = get_db()
-    with db.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("SELECT * FROM messages ORDER BY id DESC;")
-        return cur.fetchall()
-
-def count_unread_messages():
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM messages WHERE is_read = FALSE;")
-        return cur.fetchone()[0]
-
-def require_admin():
-    if not session.get("is_admin"):
-        return redirect(url_for("login"))
-    return None
-
-# İlk istek gelince DB hazırla (her worker için güvenli; seed count-check yapıyor)
-@app.before_request
-def _ensure_db_once():
-    if not getattr(app, "_db_ready", False):
-        init_db()
-        seed_products_if_empty()
-        app._db_ready = True
-
-# --- WhatsApp satın al ---
-def whatsapp_buy_link(p):
-    num = get_whatsapp_number().strip()
-    if not num:
-        return ""
-    text = (
-        "Merhaba, sipariş vermek istiyorum.\n\n"
-        f"Ürün: {p['name']}\n"
-        f"Kategori: {p['category']}\n"
-        f"Malzeme: {p['material']}\n"
-        f"Fiyat: {p['price']} TL\n"
-        f"Stok: {p['stock']}\n"
-        f"Üretim süresi: {p['lead_time_days']} gün\n"
-        f"Ürün ID: #{p['id']}\n\n"
-        "Adet: 1\n"
-        "Renk/Not: "
-    )
-    return f"https://wa.me/{num}?text={urllib.parse.quote(text)}"
-
-# --- UI ---
-BASE_HTML = """
-<!doctype html>
-<html lang="tr">
-<head>
-  <meta charset="utf-8" />
-  <meta name="google-site-verification" content="HBVllIojMaoa8XXWm9ly8JCE22uVT9xKETtIDWpegmA" />
-  <meta name="viewport" content="width=device-width,initial-scale=1" />
-  <title>{{ title }}</title>
-  <style>
-    :root { --bg:#0b0f1a; --card:#11182a; --text:#eaf0ff; --muted:#a8b3cf; --accent:#4da3ff; --line:#1f2a44; }
-    body { margin:0; font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial; background:linear-gradient(180deg,#070a12, #0b0f1a); color:var(--text); }
-    .wrap { max-width: 980px; margin: 0 auto; padding: 18px; }
-    .nav { display:flex; gap:10px; align-items:center; justify-content:space-between; position: sticky; top:0;
-      background:rgba(11,15,26,.85); backdrop-filter: blur(8px); border-bottom: 1px solid var(--line);
-      padding: 12px 18px; z-index: 10; }
-    .brand { display:flex; flex-direction:column; line-height:1.1; }
-    .brand b { font-size: 16px; letter-spacing:.2px; }
-    .brand small { color:var(--muted); }
-    .links { display:flex; gap:10px; flex-wrap:wrap; align-items:center; }
-    a.btn, button.btn { display:inline-flex; align-items:center; justify-content:center; gap:8px; padding: 8px 12px;
-      border-radius: 10px; border: 1px solid var(--line); color:var(--text); text-decoration:none;
-      background: rgba(255,255,255,0.03); cursor: pointer; white-space: nowrap; }
-    a.btn:hover, button.btn:hover { border-color: rgba(77,163,255,.6); }
-    .btn.primary { background: rgba(77,163,255,.15); border-color: rgba(77,163,255,.6); }
-    .btn.danger { border-color: rgba(255,80,80,.6); background: rgba(255,80,80,.08); }
-    .btn.ok { border-color: rgba(120,255,160,.45); background: rgba(120,255,160,.08); }
-    .grid { display:grid; grid-template-columns: 1.2fr .8fr; gap:14px; }
-    @media (max-width: 900px){ .grid{ grid-template-columns: 1fr; } }
-    .card { background: rgba(17,24,42,.85); border:1px solid var(--line); border-radius: 18px; padding: 16px; }
-    h1 { margin: 0 0 10px; font-size: 28px; }
-    h2 { margin: 0 0 10px; font-size: 18px; }
-    p { margin: 8px 0; color:var(--muted); }
-    .list { display:flex; flex-direction:column; gap:10px; margin-top:10px; }
-    .item { display:flex; justify-content:space-between; gap:12px; padding: 12px; border-radius: 14px; border:1px solid var(--line); background: rgba(255,255,255,0.02); }
-    .left { display:flex; gap:12px; align-items:flex-start; }
-    .thumb { width:78px; height:78px; border-radius:14px; border:1px solid var(--line); background: rgba(0,0,0,.25);
-             overflow:hidden; display:flex; align-items:center; justify-content:center; color:var(--muted); font-size:12px; }
-    .thumb img { width:100%; height:100%; object-fit:cover; display:block; }
-    .meta { display:flex; flex-direction:column; gap:4px; }
-    .meta b { font-size: 15px; }
-    .sub { color:var(--muted); font-size:13px; line-height:1.25; }
-    .pills { display:flex; flex-wrap:wrap; gap:6px; margin-top:6px; }
-    .pill { font-size:12px; padding:4px 8px; border-radius:999px; border:1px solid var(--line); color:var(--muted); }
-    input, textarea, select { width:100%; box-sizing:border-box; padding: 10px 12px; border-radius: 12px;
-      border: 1px solid var(--line); background: rgba(0,0,0,.25); color: var(--text); outline:none; }
-    input:focus, textarea:focus, select:focus { border-color: rgba(77,163,255,.7); }
-    .row { display:flex; gap:10px; }
-    .row > * { flex:1; }
-    .actions { display:flex; gap:8px; align-items:center; flex-wrap:wrap; justify-content:flex-end; }
-    .kpi { display:flex; gap:8px; flex-wrap:wrap; margin-top:10px; }
-    .footer { padding: 22px 0; color: var(--muted); font-size: 13px; }
-    .hr { height:1px; background: var(--line); margin: 12px 0; }
-    .msg { border:1px solid rgba(255,80,80,.55); background: rgba(255,80,80,.08); padding:10px 12px; border-radius:14px; margin-bottom:12px; }
-  </style>
-</head>
-<body>
-  <div class="nav">
-    <div class="brand">
-      <b>3D Baskı Atölyesi</b>
-      <small>Özel tasarım • Hızlı üretim</small>
-    </div>
-    <div class="links">
-      <a class="btn" href="{{ url_for('home') }}">Ana Sayfa</a>
-      <a class="btn" href="{{ url_for('products') }}">Ürünler</a>
-      <a class="btn" href="{{ url_for('vision') }}">Vizyon & Misyon</a>
-      <a class="btn" href="{{ url_for('contact') }}">İletişim</a>
-      {% if session.get("is_admin") %}
-        <a class="btn primary" href="{{ url_for('admin') }}">Panel</a>
-        <a class="btn" href="{{ url_for('logout') }}">Çıkış</a>
-      {% else %}
-        <a class="btn primary" href="{{ url_for('login') }}">Yönetim</a>
-      {% endif %}
-    </div>
-  </div>
-  <div class="wrap">
-    {{ body|safe }}
-    <div class="footer">© {{ year }} • {{ now }}</div>
-  </div>
-</body>
-</html>
-"""
-
-def page(title: str, body_html: str):
-    return render_template_string(
-        BASE_HTML,
-        title=title,
-        body=body_html,
-        year=datetime.now().year,
-        now=datetime.now().strftime("%d.%m.%Y %H:%M"),
-        session=session
-    )
-
-# --- Routes ---
-@app.get("/")
-def home():
-    total = len(fetch_products())
-    categories = distinct_values("category")
-    materials = distinct_values("material")
-    unread = count_unread_messages() if session.get("is_admin") else None
-
-    right_extra = ""
-    if session.get("is_admin"):
-        right_extra = f"""
-        <div class="hr"></div>
-        <p class="sub">Yönetim</p>
-        <div class="actions" style="justify-content:flex-start">
-          <a class="btn primary" href="/admin">Panele gir</a>
-          <a class="btn" href="/admin/messages">Mesajlar ({unread})</a>
-        </div>
-        """
-
-    body = f"""
-    <div class="grid">
-      <div class="card">
-        <h1>Özel 3D Baskı Ürünler</h1>
-        <p>Ürünlere bakabilir veya “Satın Al” ile WhatsApp’tan sipariş verebilirsin.</p>
-        <div class="list" style="margin-top:14px">
-          <div class="item">
-            <div class="meta"><b>Ürün kataloğu</b><div class="sub">Mevcut ürünleri görüntüle</div></div>
-            <a class="btn primary" href="/products">Ürünlere git</a>
-          </div>
-          <div class="item">
-            <div class="meta"><b>Tasarım & Üretim</b><div class="sub">Vizyon ve misyon sayfasında detaylar</div></div>
-            <a class="btn" href="/vision">Göz at</a>
-          </div>
-        </div>
-      </div>
-      <div class="card">
-        <h2>Atölye Özeti</h2>
-        <div class="kpi">
-          <span class="pill">Toplam ürün: {total}</span>
-          <span class="pill">Kategori: {len(categories)}</span>
-          <span class="pill">Malzeme: {len(materials)}</span>
-        </div>
-        {right_extra}
-      </div>
-    </div>
-    """
-    return page("Ana Sayfa", body)
-
-@app.get("/products")
-def products():
-    q = request.args.get("q", "")
-    cat = request.args.get("cat", "")
-    mat = request.args.get("mat", "")
-
-    rows = fetch_products(q=q, cat=cat, mat=mat)
-    categories = distinct_values("category")
-    materials = distinct_values("material")
-
-    options_cat = '<option value="">Tüm kategoriler</option>' + "".join(
-        [f'<option value="{esc(c)}" {"selected" if c==cat else ""}>{esc(c)}</option>' for c in categories]
-    )
-    options_mat = '<option value="">Tüm malzemeler</option>' + "".join(
-        [f'<option value="{esc(m)}" {"selected" if m==mat else ""}>{esc(m)}</option>' for m in materials]
-    )
-
-    items = ""
-    for p in rows:
-        photo = (p["photo_url"] or "").strip()
-        photo_html = f'<img src="{esc(photo)}" alt="Ürün">' if photo else "Görsel"
-        stl = (p["stl_url"] or "").strip()
-        stl_btn = f'<a class="btn" href="{esc(stl)}" target="_blank" rel="noopener">STL</a>' if stl else ""
-        buy_link = whatsapp_buy_link(p)
-        buy_btn = f'<a class="btn primary" href="{buy_link}" target="_blank" rel="noopener">Satın Al</a>' if buy_link else ""
-        admin_edit = f'<a class="btn" href="/admin/edit/{p["id"]}">Düzenle</a>' if session.get("is_admin") else ""
-
-        items += f"""
-        <div class="item">
-          <div class="left">
-            <div class="thumb">{photo_html}</div>
-            <div class="meta">
-              <b>{esc(p["name"])}</b>
-              <div class="sub">{esc(p["category"])} • {esc(p["material"])} • {p["price"]} TL</div>
-              <div class="pills">
-                <span class="pill">Stok: {p["stock"]}</span>
-                <span class="pill">Üretim: {p["lead_time_days"]} gün</span>
-                <span class="pill">#{p["id"]}</span>
-              </div>
-            </div>
-          </div>
-          <div class="actions">{stl_btn}{buy_btn}{admin_edit}</div>
-        </div>
-        """
-
-    body = f"""
-    <div class="card">
-      <h1>Ürünler</h1>
-      <form method="get" action="/products" class="list" style="margin-top:12px">
-        <div class="row">
-          <input name="q" value="{esc(q)}" placeholder="Ara: örn. stand, kablo, ps5..." />
-          <select name="cat">{options_cat}</select>
-          <select name="mat">{options_mat}</select>
-        </div>
-        <div class="row">
-          <button class="btn primary" type="submit">Filtrele</button>
-          <a class="btn" href="/products">Sıfırla</a>
-          {"<a class='btn' href='/admin'>Panel</a>" if session.get("is_admin") else ""}
-        </div>
-      </form>
-      <div class="list" style="margin-top:14px">
-        {items if items else "<p class='sub'>Ürün bulunamadı.</p>"}
-      </div>
-    </div>
-    """
-    return page("Ürünler", body)
-
-@app.get("/vision")
-def vision():
-    body = """
-    <div class="card">
-      <h1>Vizyon & Misyon</h1>
-      <div class="grid" style="margin-top:10px">
-        <div class="card">
-          <h2>Vizyon</h2>
-          <p>Kullanışlı, estetik ve dayanıklı 3D baskı ürünleriyle çözüm sunmak.</p>
-        </div>
-        <div class="card">
-          <h2>Misyon</h2>
-          <p>Hızlı prototipleme ve üretim ile standlar, düzenleyiciler, aksesuarlar üretmek.</p>
-          <p class="sub">PLA / PETG / TPU gibi malzemelerle ihtiyaca göre üretim.</p>
-        </div>
-      </div>
-    </div>
-    """
-    return page("Vizyon & Misyon", body)
-
-@app.get("/contact")
-def contact():
-    body = """
-    <div class="grid">
-      <div class="card">
-        <h1>İletişim</h1>
-        <p>Özel tasarım veya sipariş için mesaj bırak.</p>
-        <form method="post" action="/contact/send" class="list" style="margin-top:12px">
-          <div class="row">
-            <input name="name" placeholder="Ad Soyad" required />
-            <input name="email" placeholder="E-posta" required />
-          </div>
-          <textarea name="msg" rows="5" placeholder="İstediğin ürün / ölçü / renk / adet..." required></textarea>
-          <button class="btn primary" type="submit">Gönder</button>
-        </form>
-      </div>
-      <div class="card">
-        <h2>Bilgi</h2>
-        <p class="sub">Mesajlar yönetim panelinde listelenir.</p>
-      </div>
-    </div>
-    """
-    return page("İletişim", body)
-
-@app.post("/contact/send")
-def contact_send():
-    name = (request.form.get("name") or "").strip()
-    email = (request.form.get("email") or "").strip()
-    msg = (request.form.get("msg") or "").strip()
-
-    if not (name and email and msg):
-        return page("Hata", '<div class="card"><div class="msg">Lütfen tüm alanları doldur.</div><a class="btn primary" href="/contact">Geri dön</a></div>')
-
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("INSERT INTO messages(name, email, message) VALUES(%s,%s,%s)", (name, email, msg))
-    db.commit()
-
-    return page("Gönderildi", '<div class="card"><h1>Mesaj alındı</h1><p class="sub">En kısa sürede dönüş yapılacak.</p><a class="btn primary" href="/">Ana sayfaya dön</a></div>')
-
-@app.get("/login")
-def login():
-    body = """
-    <div class="card" style="max-width:520px">
-      <h1>Yönetim Giriş</h1>
-      <form method="post" action="/login" class="list" style="margin-top:12px">
-        <input name="username" placeholder="Kullanıcı adı" required />
-        <input name="password" type="password" placeholder="Şifre" required />
-        <button class="btn primary" type="submit">Giriş</button>
-      </form>
-    </div>
-    """
-    return page("Giriş", body)
-
-@app.post("/login")
-def login_post():
-    u = (request.form.get("username") or "").strip()
-    p = (request.form.get("password") or "")
-    if u == ADMIN_USER and p == get_admin_pass():
-        session["is_admin"] = True
-        return redirect(url_for("admin"))
-    return page("Hata", '<div class="card" style="max-width:520px"><div class="msg">Kullanıcı adı veya şifre yanlış.</div><a class="btn primary" href="/login">Tekrar dene</a></div>')
-
-@app.get("/logout")
-def logout():
-    session.clear()
-    return redirect(url_for("home"))
-
-@app.get("/admin")
-def admin():
-    r = require_admin()
-    if r: return r
-    unread = count_unread_messages()
-    body = f"""
-    <div class="grid">
-      <div class="card">
-        <h1>Panel</h1>
-        <div class="list" style="margin-top:12px">
-          <div class="item">
-            <div class="meta"><b>Ürün yönetimi</b><div class="sub">Ürün ekle / düzenle</div></div>
-            <a class="btn primary" href="/admin/products">Ürünler</a>
-          </div>
-          <div class="item">
-            <div class="meta"><b>Mesajlar</b><div class="sub">{unread} okunmamış mesaj</div></div>
-            <a class="btn primary" href="/admin/messages">Mesajlar</a>
-          </div>
-        </div>
-      </div>
-      <div class="card">
-        <h2>Durum</h2>
-        <div class="kpi">
-          <span class="pill">Okunmamış: {unread}</span>
-          <span class="pill">WhatsApp: {"Ayarlı" if get_whatsapp_number().strip() else "Kapalı"}</span>
-          <span class="pill">DB: PostgreSQL</span>
-        </div>
-      </div>
-    </div>
-    """
-    return page("Panel", body)
-
-@app.get("/admin/products")
-def admin_products():
-    r = require_admin()
-    if r: return r
-
-    rows = fetch_products()
-    items = ""
-    for p in rows:
-        items += f"""
-        <div class="item">
-          <div class="meta">
-            <b>{esc(p["name"])}</b>
-            <div class="sub">{esc(p["category"])} • {esc(p["material"])} • {p["price"]} TL</div>
-            <div class="pills">
-              <span class="pill">Stok: {p["stock"]}</span>
-              <span class="pill">Üretim: {p["lead_time_days"]} gün</span>
-              <span class="pill">#{p["id"]}</span>
-            </div>
-          </div>
-          <div class="actions">
-            <a class="btn primary" href="/admin/edit/{p["id"]}">Düzenle</a>
-            <form method="post" action="/admin/delete" style="margin:0">
-              <input type="hidden" name="id" value="{p["id"]}" />
-              <button class="btn danger" type="submit">Sil</button>
-            </form>
-          </div>
-        </div>
-        """
-
-    body = f"""
-    <div class="grid">
-      <div class="card">
-        <h1>Ürün Yönetimi</h1>
-        <form method="post" action="/admin/add" class="list" style="margin-top:12px">
-          <input name="name" placeholder="Ürün adı" required />
-          <div class="row">
-            <input name="category" placeholder="Kategori" required />
-            <select name="material" required>
-              <option value="PLA">PLA</option><option value="PETG">PETG</option><option value="TPU">TPU</option>
-              <option value="ABS">ABS</option><option value="Diğer">Diğer</option>
-            </select>
-          </div>
-          <div class="row">
-            <input name="price" type="number" min="0" step="1" placeholder="Fiyat (TL)" required />
-            <input name="stock" type="number" min="0" step="1" placeholder="Stok" required />
-          </div>
-          <div class="row">
-            <input name="lead_time_days" type="number" min="0" step="1" placeholder="Üretim süresi (gün)" required />
-            <input name="photo_url" placeholder="Foto linki (opsiyonel)" />
-          </div>
-          <input name="stl_url" placeholder="STL linki (opsiyonel)" />
-          <button class="btn primary" type="submit">Ekle</button>
-        </form>
-        <div class="hr"></div>
-        <div class="actions" style="justify-content:flex-start">
-          <a class="btn" href="/products">Kataloğu aç</a>
-          <a class="btn" href="/admin">Panele dön</a>
-        </div>
-      </div>
-      <div class="card">
-        <h2>Mevcut Ürünler</h2>
-        <div class="list" style="margin-top:10px">
-          {items if items else "<p class='sub'>Ürün yok.</p>"}
-        </div>
-      </div>
-    </div>
-    """
-    return page("Ürün Yönetimi", body)
-
-@app.post("/admin/add")
-def admin_add():
-    r = require_admin()
-    if r: return r
-
-    name = (request.form.get("name") or "").strip()
-    category = (request.form.get("category") or "").strip()
-    material = (request.form.get("material") or "").strip()
-    price = safe_int(request.form.get("price"), 0, 0)
-    stock = safe_int(request.form.get("stock"), 0, 0)
-    lead = safe_int(request.form.get("lead_time_days"), 1, 0)
-    photo_url = (request.form.get("photo_url") or "").strip()
-    stl_url = (request.form.get("stl_url") or "").strip()
-
-    if not (name and category and material):
-        return redirect(url_for("admin_products"))
-
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("""
-            INSERT INTO products(name, category, material, price, stock, lead_time_days, photo_url, stl_url)
-            VALUES(%s,%s,%s,%s,%s,%s,%s,%s)
-        """, (name, category, material, price, stock, lead, photo_url, stl_url))
-    db.commit()
-    return redirect(url_for("admin_products"))
-
-@app.post("/admin/delete")
-def admin_delete():
-    r = require_admin()
-    if r: return r
-
-    pid = safe_int(request.form.get("id"), 0, 0)
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("DELETE FROM products WHERE id=%s", (pid,))
-    db.commit()
-    return redirect(url_for("admin_products"))
-
-@app.get("/admin/edit/<int:pid>")
-def admin_edit(pid: int):
-    r = require_admin()
-    if r: return r
-    p = fetch_product(pid)
-    if not p:
-        return page("Düzenle", '<div class="card"><div class="msg">Ürün bulunamadı.</div><a class="btn primary" href="/admin/products">Geri dön</a></div>')
-
-    def mat_opts(sel):
-        opts = ["PLA","PETG","TPU","ABS","Diğer"]
-        return "".join([f'<option value="{esc(o)}" {"selected" if o==sel else ""}>{esc(o)}</option>' for o in opts])
-
-    body = f"""
-    <div class="card" style="max-width: 760px">
-      <h1>Ürün Düzenle</h1>
-      <p class="sub">#{p["id"]}</p>
-      <form method="post" action="/admin/edit/{p["id"]}" class="list" style="margin-top:12px">
-        <input name="name" value="{esc(p["name"])}" required />
-        <div class="row">
-          <input name="category" value="{esc(p["category"])}" required />
-          <select name="material" required>{mat_opts(p["material"] or "")}</select>
-        </div>
-        <div class="row">
-          <input name="price" type="number" min="0" step="1" value="{p["price"]}" required />
-          <input name="stock" type="number" min="0" step="1" value="{p["stock"]}" required />
-        </div>
-        <div class="row">
-          <input name="lead_time_days" type="number" min="0" step="1" value="{p["lead_time_days"]}" required />
-          <input name="photo_url" value="{esc(p["photo_url"] or "")}" />
-        </div>
-        <input name="stl_url" value="{esc(p["stl_url"] or "")}" />
-        <div class="row">
-          <button class="btn primary" type="submit">Kaydet</button>
-          <a class="btn" href="/admin/products">İptal</a>
-        </div>
-      </form>
-    </div>
-    """
-    return page("Düzenle", body)
-
-@app.post("/admin/edit/<int:pid>")
-def admin_edit_post(pid: int):
-    r = require_admin()
-    if r: return r
-
-    if not fetch_product(pid):
-        return redirect(url_for("admin_products"))
-
-    name = (request.form.get("name") or "").strip()
-    category = (request.form.get("category") or "").strip()
-    material = (request.form.get("material") or "").strip()
-    price = safe_int(request.form.get("price"), 0, 0)
-    stock = safe_int(request.form.get("stock"), 0, 0)
-    lead = safe_int(request.form.get("lead_time_days"), 1, 0)
-    photo_url = (request.form.get("photo_url") or "").strip()
-    stl_url = (request.form.get("stl_url") or "").strip()
-
-    if not (name and category and material):
-        return redirect(url_for("admin_edit", pid=pid))
-
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("""
-            UPDATE products
-            SET name=%s, category=%s, material=%s, price=%s, stock=%s, lead_time_days=%s, photo_url=%s, stl_url=%s
-            WHERE id=%s
-        """, (name, category, material, price, stock, lead, photo_url, stl_url, pid))
-    db.commit()
-    return redirect(url_for("admin_products"))
-
-@app.get("/admin/messages")
-def admin_messages():
-    r = require_admin()
-    if r: return r
-
-    rows = fetch_messages()
-    unread = count_unread_messages()
-
-    items = ""
-    for m in rows:
-        status = "Okundu" if m["is_read"] else "Yeni"
-        items += f"""
-        <div class="item">
-          <div class="meta">
-            <b>{esc(m["name"])}</b> <span class="pill">{status}</span>
-            <div class="sub">{esc(m["email"])} • {m["created_at"]}</div>
-            <div class="sub" style="margin-top:6px; white-space:pre-wrap">{esc(m["message"])}</div>
-          </div>
-          <div class="actions">
-            <form method="post" action="/admin/messages/read" style="margin:0">
-              <input type="hidden" name="id" value="{m["id"]}">
-              <button class="btn ok" type="submit">Okundu</button>
-            </form>
-            <form method="post" action="/admin/messages/delete" style="margin:0">
-              <input type="hidden" name="id" value="{m["id"]}">
-              <button class="btn danger" type="submit">Sil</button>
-            </form>
-          </div>
-        </div>
-        """
-
-    body = f"""
-    <div class="card">
-      <h1>Mesajlar</h1>
-      <p class="sub">{unread} okunmamış mesaj</p>
-      <div class="actions" style="justify-content:flex-start; margin-top:10px">
-        <a class="btn" href="/admin">Panele dön</a>
-        <a class="btn" href="/admin/products">Ürünler</a>
-      </div>
-      <div class="list" style="margin-top:14px">
-        {items if items else "<p class='sub'>Mesaj yok.</p>"}
-      </div>
-    </div>
-    """
-    return page("Mesajlar", body)
-
-@app.post("/admin/messages/read")
-def admin_message_read():
-    r = require_admin()
-    if r: return r
-    mid = safe_int(request.form.get("id"), 0, 0)
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("UPDATE messages SET is_read=TRUE WHERE id=%s", (mid,))
-    db.commit()
-    return redirect(url_for("admin_messages"))
-
-@app.post("/admin/messages/delete")
-def admin_message_delete():
-    r = require_admin()
-    if r: return r
-    mid = safe_int(request.form.get("id"), 0, 0)
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("DELETE FROM messages WHERE id=%s", (mid,))
-    db.commit()
-    return redirect(url_for("admin_messages"))
-
-if __name__ == "__main__":
-    port = int(os.environ.get("PORT", "5000"))
-    app.run(host="0.0.0.0", port=port, debug=False)
-
+from flask import Flask, Response, request, redirect, url_for, session, g, stream_with_context
+from markupsafe import escape as markupsafe_escape
+from collections import OrderedDict
+import gzip
+import hashlib
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.parse
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import NamedTupleCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+log = logging.getLogger(__name__)
+
+app = Flask(__name__)
+app.secret_key = os.environ.get("SECRET_KEY", "degistir-bunu-123")
+# Şablonlar runtime'da değişmez; render'da güncellik kontrolü yapma
+app.jinja_env.auto_reload = False
+
+ADMIN_USER = "admin"
+# Env çalışma sırasında değişmez; her istekte os.environ'a gitmeye gerek yok
+ADMIN_PASS = os.environ.get("ADMIN_PASS", "")
+WHATSAPP_NUMBER = os.environ.get("WHATSAPP_NUMBER", "").strip()
+
+def get_database_url() -> str:
+    return os.environ.get("DATABASE_URL", "")
+
+# --- küçük yardımcılar ---
+def esc(s: str) -> str:
+    # markupsafe (Flask bağımlılığı) C ile tek geçişte escape eder
+    return str(markupsafe_escape(s or ""))
+
+def safe_int(value, default=0, minv=None, maxv=None):
+    try:
+        v = int(str(value).strip())
+    except Exception:
+        v = default
+    if minv is not None:
+        v = max(minv, v)
+    if maxv is not None:
+        v = min(maxv, v)
+    return v
+
+# --- PostgreSQL ---
+class _PoolConnection(psycopg2.extensions.connection):
+    """Havuz bağlantısı: oturum ayarı bir kez uygulandı mı bayrağını taşır."""
+    session_tuned = False
+
+_pool = None
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        dsn = get_database_url()
+        if not dsn:
+            raise RuntimeError("DATABASE_URL environment variable is not set.")
+        # Render/PG genelde SSL ister; URL içinde sslmode yoksa ekleyelim
+        if "sslmode=" not in dsn:
+            joiner = "&" if "?" in dsn else "?"
+            dsn = dsn + f"{joiner}sslmode=require"
+        _pool = ThreadedConnectionPool(
+            minconn=safe_int(os.environ.get("DB_POOL_MIN"), 2, 1),
+            maxconn=safe_int(os.environ.get("DB_POOL_MAX"), 10, 1),
+            dsn=dsn,
+            connection_factory=_PoolConnection,
+            # Uzun ömürlü bağlantılar: sessiz kopmaları TCP keepalive yakalasın
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+        )
+    return _pool
+
+def get_db():
+    if "db" not in g:
+        pool = _get_pool()
+        db = pool.getconn()
+        # Havuzdan ölü bağlantı çıkarsa (sunucu kapattıysa) atıp tazesini al
+        if db.closed:
+            pool.putconn(db, close=True)
+            db = pool.getconn()
+        if not db.session_tuned:
+            # Tüm yazmalar tek statement: autocommit ile BEGIN/COMMIT trafiği yok.
+            # synchronous_commit=off: commit WAL flush'ını beklemesin; çökmede son
+            # birkaç saniyelik yazma riske girer, bu uygulama için kabul edilebilir
+            db.autocommit = True
+            with db.cursor() as cur:
+                cur.execute("SET synchronous_commit TO off;")
+            db.session_tuned = True
+        g.db = db
+    return g.db
+
+@app.teardown_appcontext
+def close_db(_err):
+    db = g.pop("db", None)
+    if db is not None:
+        # Açık kalan transaction'ı geri al; bağlantı bozuksa havuza koymayıp kapat
+        try:
+            db.rollback()
+            _get_pool().putconn(db)
+        except Exception:
+            _get_pool().putconn(db, close=True)
+
+def init_db():
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                material TEXT NOT NULL,
+                price INTEGER NOT NULL DEFAULT 0,
+                stock INTEGER NOT NULL DEFAULT 0,
+                lead_time_days INTEGER NOT NULL DEFAULT 1,
+                photo_url TEXT,
+                stl_url TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                message TEXT NOT NULL,
+                is_read BOOLEAN NOT NULL DEFAULT FALSE,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+        """)
+        # Filtre kolonları ve okunmamış sayacı için index'ler (yoksa seq scan olur)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_products_material ON products(material);")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_messages_unread
+            ON messages(is_read) WHERE is_read = FALSE;
+        """)
+        # Okunanları temizleme (is_read=TRUE ... LIMIT) için kapsayıcı index;
+        # yukarıdaki partial index sadece FALSE tarafını kapsıyor
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_read_id ON messages(is_read, id);")
+    # İsim araması için trigram GIN index; uzantı kurulamıyorsa (yetki yok)
+    # sessizce vazgeç, ILIKE yine çalışır ama seq scan olur
+    try:
+        with db.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_products_name_trgm
+                ON products USING gin (name gin_trgm_ops);
+            """)
+    except psycopg2.Error:
+        db.rollback()
+
+SEED_PRODUCTS = [
+    ("PS5 DualSense Stand (Ters Slotlu)", "Aksesuar", "PLA", 249, 15, 2, "", ""),
+    ("Kablo Düzenleyici Klips Seti (10'lu)", "Organizasyon", "PETG", 129, 40, 1, "", ""),
+    ("Masa Üstü Telefon Standı (Ayarlı)", "Stand", "PLA", 159, 25, 1, "", ""),
+]
+
+def seed_products_if_empty():
+    db = get_db()
+    with db.cursor() as cur:
+        # EXISTS ilk satırda durur; COUNT(*) gibi tabloyu taramaz
+        cur.execute("SELECT EXISTS(SELECT 1 FROM products);")
+        if not cur.fetchone()[0]:
+            execute_values(cur, """
+                INSERT INTO products(name, category, material, price, stock, lead_time_days, photo_url, stl_url)
+                VALUES %s
+            """, SEED_PRODUCTS)
+    invalidate_filter_cache()
+
+# Render yollarının kullandığı kolonlar; created_at hiçbir sayfada gösterilmiyor
+PRODUCT_COLS = "id, name, category, material, price, stock, lead_time_days, photo_url, stl_url"
+
+def _execute_prepared(cur, name, prepare_sql, args=()):
+    """Sunucu tarafı prepared statement'ı çalıştırır.
+
+    Havuzdan gelen bağlantıda statement henüz yoksa ilk EXECUTE
+    InvalidSqlStatementName verir; o zaman PREPARE edip tekrar dener.
+    Parse/plan maliyeti böylece bağlantı başına bir kez ödenir.
+    """
+    stmt = f"EXECUTE {name} ({', '.join(['%s'] * len(args))})" if args else f"EXECUTE {name}"
+    try:
+        cur.execute(stmt, args or None)
+    except psycopg2.errors.InvalidSqlStatementName:
+        cur.connection.rollback()  # autocommit'te no-op; güvenlik için duruyor
+        cur.execute(prepare_sql)
+        cur.execute(stmt, args or None)
+
+def fetch_products(q="", cat="", mat=""):
+    q = (q or "").strip()
+    cat = (cat or "").strip()
+    mat = (mat or "").strip()
+
+    sql = f"SELECT {PRODUCT_COLS} FROM products WHERE 1=1"
+    args = []
+
+    if q:
+        # ILIKE + pg_trgm GIN index: LOWER(name) LIKE'ın aksine index kullanır.
+        # Kelime başına ayrı ILIKE → "ps5 stand" gibi çok kelimeli arama da çalışır
+        for tok in q.split():
+            sql += " AND name ILIKE %s"
+            args.append(f"%{tok}%")
+    if cat:
+        sql += " AND category = %s"
+        args.append(cat)
+    if mat:
+        sql += " AND material = %s"
+        args.append(mat)
+
+    sql += " ORDER BY id DESC"
+
+    db = get_db()
+    with db.cursor(cursor_factory=NamedTupleCursor) as cur:
+        if not args:
+            # En sık durum filtresiz katalog: sabit şekilli sorguyu prepared
+            # statement olarak yeniden kullan (fetch_product ile aynı desen)
+            _execute_prepared(cur, "p_fetch_products_all",
+                f"PREPARE p_fetch_products_all AS SELECT {PRODUCT_COLS} FROM products ORDER BY id DESC;")
+        else:
+            cur.execute(sql, args)
+        return cur.fetchall()
+
+def fetch_product(pid: int):
+    db = get_db()
+    with db.cursor(cursor_factory=NamedTupleCursor) as cur:
+        _execute_prepared(cur, "p_fetch_product",
+            f"PREPARE p_fetch_product AS SELECT {PRODUCT_COLS} FROM products WHERE id=$1;",
+            (pid,))
+        return cur.fetchone()
+
+# Dropdown verisi nadiren değişir; kısa TTL + admin yazınca invalidation yeter
+_filter_cache = None
+
+def invalidate_filter_cache():
+    global _filter_cache
+    _filter_cache = None
+
+def fetch_filter_options():
+    """Kategori ve malzeme listelerini tek sorguda getirir (60 sn cache'li)."""
+    global _filter_cache
+    now = time.monotonic()
+    if _filter_cache is not None and now - _filter_cache[0] < 60:
+        return _filter_cache[1]
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT 'c' AS kind, category AS v FROM products GROUP BY category
+            UNION ALL
+            SELECT 'm', material FROM products GROUP BY material
+            ORDER BY 1, 2;
+        """)
+        categories, materials = [], []
+        for kind, v in cur.fetchall():
+            if not (v or "").strip():
+                continue
+            (categories if kind == "c" else materials).append(v)
+        _filter_cache = (now, (categories, materials))
+        return categories, materials
+
+# Dropdown <option> HTML'i değer listesi başına bir kez kurulur; filtre
+# cache'i yeni liste döndürünce anahtar değişir, eski girdiler temizlenir
+_options_cache = {}
+
+def _cached_options(values):
+    key = tuple(values)
+    hit = _options_cache.get(key)
+    if hit is None:
+        if len(_options_cache) > 8:
+            _options_cache.clear()
+        hit = [(v, f'<option value="{esc(v)}">{esc(v)}</option>') for v in values]
+        _options_cache[key] = hit
+    return hit
+
+def render_options(values, selected, empty_label):
+    out = [f'<option value="">{empty_label}</option>']
+    for v, html in _cached_options(values):
+        if v == selected:
+            out.append(f'<option value="{esc(v)}" selected>{esc(v)}</option>')
+        else:
+            out.append(html)
+    return "".join(out)
+
+def fetch_home_summary():
+    """Ana sayfa özeti: toplam ürün + kategori/malzeme listeleri, tek round-trip."""
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT count(*),
+                   array_remove(array_agg(DISTINCT category) FILTER (WHERE category <> ''), NULL),
+                   array_remove(array_agg(DISTINCT material) FILTER (WHERE material <> ''), NULL)
+            FROM products;
+        """)
+        total, categories, materials = cur.fetchone()
+        return total, categories or [], materials or []
+
+def fetch_messages():
+    db = get_db()
+    with db.cursor(cursor_factory=NamedTupleCursor) as cur:
+        cur.execute("SELECT * FROM messages ORDER BY id DESC;")
+        return cur.fetchall()
+
+# Okunmamış sayacı her admin sayfasında lazım; filtre cache'iyle aynı desen:
+# kısa TTL + mesaj yazan uçlarda invalidation
+_unread_cache = None
+
+def invalidate_unread_cache():
+    global _unread_cache
+    _unread_cache = None
+
+def count_unread_messages():
+    global _unread_cache
+    now = time.monotonic()
+    if _unread_cache is not None and now - _unread_cache[0] < 30:
+        return _unread_cache[1]
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM messages WHERE is_read = FALSE;")
+        n = cur.fetchone()[0]
+    _unread_cache = (now, n)
+    return n
+
+# Parametresiz endpoint'lerin URL'leri sabittir; her redirect'te URL map
+# taramak yerine ilk çözümlemeyi sakla. 303 ayrıca geri tuşunda formun
+# yeniden POST edilmesini engeller.
+_url_cache = {}
+
+def redirect_to(endpoint: str):
+    u = _url_cache.get(endpoint)
+    if u is None:
+        u = _url_cache.setdefault(endpoint, url_for(endpoint))
+    return redirect(u, code=303)
+
+def require_admin():
+    if not session.get("is_admin"):
+        return redirect_to("login")
+    return None
+
+# Çift tıklama/yeniden gönderme koruması: her yıkıcı form render'ında tek
+# kullanımlık token üretilir; işlenen token'lar sınırlı bir sette tutulur,
+# tekrar gelen gönderim DB'ye hiç dokunmadan redirect'e kısa devre yapar
+_seen_tokens = OrderedDict()
+_seen_tokens_lock = threading.Lock()
+_SEEN_TOKENS_MAX = 4096
+
+def form_token() -> str:
+    return secrets.token_urlsafe(16)
+
+def token_replayed(tok) -> bool:
+    """Token ilk görüşte kaydedilir (False); aynısı tekrar gelirse True."""
+    if not tok:
+        return False  # token'sız gönderim (örn. eski sekme) normal işlensin
+    with _seen_tokens_lock:
+        if tok in _seen_tokens:
+            return True
+        _seen_tokens[tok] = None
+        while len(_seen_tokens) > _SEEN_TOKENS_MAX:
+            _seen_tokens.popitem(last=False)
+        return False
+
+# Şema/seed hazırlığı: istek yolundan çıkarıldı, worker başına bir kez çalışır
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        with app.app_context():
+            init_db()
+            seed_products_if_empty()
+        _schema_ready = True
+
+# --- HTTP cache başlıkları ---
+@app.after_request
+def set_cache_headers(resp):
+    if request.method != "GET" or resp.status_code != 200 or request.endpoint is None:
+        return resp
+    if request.endpoint == "static":
+        # İçerik değişirse link ?v= ile bust edilir, dosya agresif cache'lenebilir
+        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return resp
+    if request.endpoint in ("vision", "contact"):
+        # Paylaşımlı proxy'ler admin nav'lı sayfayı başkasına vermesin diye Vary: Cookie
+        resp.headers["Cache-Control"] = "public, max-age=300"
+        resp.headers["Vary"] = "Cookie"
+    if resp.mimetype == "text/html" and not resp.direct_passthrough and not resp.is_streamed:
+        # 1KB üstü gövdeleri gzip'le; ETag + conditional GET ile tekrarlar 304 olur.
+        # Akıtılan yanıtlara dokunma: get_data() üreteci sonuna kadar tüketip
+        # gövdeyi tamponlar, page_stream'in bütün amacını boşa çıkarırdı
+        body = resp.get_data()
+        gzippable = len(body) > 1024 and "gzip" in request.headers.get("Accept-Encoding", "")
+        if gzippable:
+            resp.vary.add("Accept-Encoding")
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        resp.set_etag(etag + "-gz" if gzippable else etag)
+        resp.make_conditional(request)
+        # Sıkıştırmayı 304 kararından sonraya bırak: atılacak gövde için
+        # gzip maliyeti ödenmesin
+        if gzippable and resp.status_code == 200:
+            resp.set_data(gzip.compress(body, 6))
+            resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+# --- WhatsApp satın al ---
+_wa_prefix = f"https://wa.me/{WHATSAPP_NUMBER}?text=" if WHATSAPP_NUMBER else ""
+
+def whatsapp_ready() -> bool:
+    return bool(_wa_prefix)
+
+def whatsapp_buy_link(p):
+    if not whatsapp_ready():
+        return ""
+    text = (
+        "Merhaba, sipariş vermek istiyorum.\n\n"
+        f"Ürün: {p.name}\n"
+        f"Kategori: {p.category}\n"
+        f"Malzeme: {p.material}\n"
+        f"Fiyat: {p.price} TL\n"
+        f"Stok: {p.stock}\n"
+        f"Üretim süresi: {p.lead_time_days} gün\n"
+        f"Ürün ID: #{p.id}\n\n"
+        "Adet: 1\n"
+        "Renk/Not: "
+    )
+    return _wa_prefix + urllib.parse.quote_from_bytes(text.encode("utf-8"))
+
+# --- UI ---
+BASE_HTML = """
+<!doctype html>
+<html lang="tr">
+<head>
+  <meta charset="utf-8" />
+  <meta name="google-site-verification" content="HBVllIojMaoa8XXWm9ly8JCE22uVT9xKETtIDWpegmA" />
+  <meta name="viewport" content="width=device-width,initial-scale=1" />
+  <title>{{ title }}</title>
+  <link rel="stylesheet" href="{{ url_for('static', filename='site.css') }}?v=1" />
+</head>
+<body>
+  <div class="nav">
+    <div class="brand">
+      <b>3D Baskı Atölyesi</b>
+      <small>Özel tasarım • Hızlı üretim</small>
+    </div>
+    <div class="links">
+      <a class="btn" href="{{ url_for('home') }}">Ana Sayfa</a>
+      <a class="btn" href="{{ url_for('products') }}">Ürünler</a>
+      <a class="btn" href="{{ url_for('vision') }}">Vizyon & Misyon</a>
+      <a class="btn" href="{{ url_for('contact') }}">İletişim</a>
+      {% if session.get("is_admin") %}
+        <a class="btn primary" href="{{ url_for('admin') }}">Panel</a>
+        <a class="btn" href="{{ url_for('logout') }}">Çıkış</a>
+      {% else %}
+        <a class="btn primary" href="{{ url_for('login') }}">Yönetim</a>
+      {% endif %}
+    </div>
+  </div>
+  <div class="wrap">
+    {{ body|safe }}
+    <div class="footer">© {{ year }} • {{ now }}</div>
+  </div>
+</body>
+</html>
+"""
+
+# Şablonu her istekte yeniden derlememek için bir kez compile et
+_BASE_TMPL = app.jinja_env.from_string(BASE_HTML)
+
+# Ürün satırı: autoescape'li derlenmiş fragment (escaping markupsafe'in C koduyla)
+_PRODUCT_ROW_TMPL = app.jinja_env.from_string("""
+        <div class="item">
+          <div class="left">
+            <div class="thumb">{% set photo = (p.photo_url or "")|trim %}{% if photo %}<img src="{{ photo }}" alt="Ürün">{% else %}Görsel{% endif %}</div>
+            <div class="meta">
+              <b>{{ p.name }}</b>
+              <div class="sub">{{ p.category }} • {{ p.material }} • {{ p.price }} TL</div>
+              <div class="pills">
+                <span class="pill">Stok: {{ p.stock }}</span>
+                <span class="pill">Üretim: {{ p.lead_time_days }} gün</span>
+                <span class="pill">#{{ p.id }}</span>
+              </div>
+            </div>
+          </div>
+          <div class="actions">
+            {%- set stl = (p.stl_url or "")|trim %}
+            {%- if stl %}<a class="btn" href="{{ stl }}" target="_blank" rel="noopener">STL</a>{% endif %}
+            {%- if buy_link %}<a class="btn primary" href="{{ buy_link }}" target="_blank" rel="noopener">Satın Al</a>{% endif %}
+            {%- if is_admin %}<a class="btn" href="/admin/edit/{{ p.id }}">Düzenle</a>{% endif %}
+          </div>
+        </div>
+""")
+
+# Admin ürün listesi satırı; katalog satırıyla aynı derlenmiş-fragment yaklaşımı
+_ADMIN_PRODUCT_ROW_TMPL = app.jinja_env.from_string("""
+        <div class="item">
+          <div class="meta">
+            <b>{{ p.name }}</b>
+            <div class="sub">{{ p.category }} • {{ p.material }} • {{ p.price }} TL</div>
+            <div class="pills">
+              <span class="pill">Stok: {{ p.stock }}</span>
+              <span class="pill">Üretim: {{ p.lead_time_days }} gün</span>
+              <span class="pill">#{{ p.id }}</span>
+            </div>
+          </div>
+          <div class="actions">
+            <a class="btn primary" href="/admin/edit/{{ p.id }}">Düzenle</a>
+            <form method="post" action="/admin/delete" style="margin:0">
+              <input type="hidden" name="id" value="{{ p.id }}" />
+              <input type="hidden" name="tok" value="{{ tok }}" />
+              <button class="btn danger" type="submit">Sil</button>
+            </form>
+          </div>
+        </div>
+""")
+
+# Footer damgası dakika hassasiyetli; strftime'ı dakikada bir kez çalıştır
+_footer_now_cache = (-1, "", 0)  # (dakika bucket, metin, yıl)
+
+def page(title: str, body_html: str):
+    global _footer_now_cache
+    bucket = int(time.time() // 60)
+    if _footer_now_cache[0] != bucket:
+        lt = time.localtime()
+        _footer_now_cache = (bucket, time.strftime("%d.%m.%Y %H:%M", lt), lt.tm_year)
+    _, now_s, year = _footer_now_cache
+    return _BASE_TMPL.render(
+        title=title,
+        body=body_html,
+        year=year,
+        now=now_s,
+        session=session
+    )
+
+# Gövdesi tamamen statik sayfalar için render cache'i. Nav admin'e göre
+# değiştiğinden anahtar (başlık, admin) ikilisi; footer saati için 60 sn TTL.
+_static_page_cache = {}
+
+def static_page(title: str, body_html: str):
+    key = (title, bool(session.get("is_admin")))
+    now = time.monotonic()
+    hit = _static_page_cache.get(key)
+    if hit is not None and now - hit[0] < 60:
+        return hit[1]
+    html = page(title, body_html)
+    _static_page_cache[key] = (now, html)
+    return html
+
+# Bu satır sayısının üstündeki listeler tek dev string yerine akıtılarak döner
+STREAM_ROW_THRESHOLD = 200
+
+def page_stream(title: str, body_parts):
+    """page()'in akıtan hali: gövde parçalarını tek string'e toplamadan yollar.
+
+    Taban şablon bir sentinel gövdeyle render edilip ikiye bölünür; yanıt
+    önce baş kısmı, sonra parçaları, en son kuyruğu yield eder. Böylece tepe
+    bellek sınırlı kalır ve tarayıcı nav/head'i hemen almaya başlar.
+
+    Bilinçli ödün: set_cache_headers akıtılan yanıtları tamponlamamak için
+    atlar, yani bu sayfalar gzip'siz ve ETag'siz gider.
+    """
+    prefix, suffix = page(title, "\x00").split("\x00", 1)
+
+    def generate():
+        yield prefix
+        for part in body_parts:
+            yield part
+        yield suffix
+
+    return Response(stream_with_context(generate()), mimetype="text/html")
+
+# --- Routes ---
+@app.get("/")
+def home():
+    total, categories, materials = fetch_home_summary()
+    unread = count_unread_messages() if session.get("is_admin") else None
+
+    right_extra = ""
+    if session.get("is_admin"):
+        right_extra = f"""
+        <div class="hr"></div>
+        <p class="sub">Yönetim</p>
+        <div class="actions" style="justify-content:flex-start">
+          <a class="btn primary" href="/admin">Panele gir</a>
+          <a class="btn" href="/admin/messages">Mesajlar ({unread})</a>
+        </div>
+        """
+
+    body = f"""
+    <div class="grid">
+      <div class="card">
+        <h1>Özel 3D Baskı Ürünler</h1>
+        <p>Ürünlere bakabilir veya “Satın Al” ile WhatsApp’tan sipariş verebilirsin.</p>
+        <div class="list" style="margin-top:14px">
+          <div class="item">
+            <div class="meta"><b>Ürün kataloğu</b><div class="sub">Mevcut ürünleri görüntüle</div></div>
+            <a class="btn primary" href="/products">Ürünlere git</a>
+          </div>
+          <div class="item">
+            <div class="meta"><b>Tasarım & Üretim</b><div class="sub">Vizyon ve misyon sayfasında detaylar</div></div>
+            <a class="btn" href="/vision">Göz at</a>
+          </div>
+        </div>
+      </div>
+      <div class="card">
+        <h2>Atölye Özeti</h2>
+        <div class="kpi">
+          <span class="pill">Toplam ürün: {total}</span>
+          <span class="pill">Kategori: {len(categories)}</span>
+          <span class="pill">Malzeme: {len(materials)}</span>
+        </div>
+        {right_extra}
+      </div>
+    </div>
+    """
+    return page("Ana Sayfa", body)
+
+@app.get("/products")
+def products():
+    q = request.args.get("q", "")
+    cat = request.args.get("cat", "")
+    mat = request.args.get("mat", "")
+
+    rows = fetch_products(q=q, cat=cat, mat=mat)
+    categories, materials = fetch_filter_options()
+
+    options_cat = render_options(categories, cat, "Tüm kategoriler")
+    options_mat = render_options(materials, mat, "Tüm malzemeler")
+
+    is_admin = bool(session.get("is_admin"))
+    # Numara ayarlı değilse satır başına link üretmeyi komple atla
+    wa = whatsapp_ready()
+
+    head = f"""
+    <div class="card">
+      <h1>Ürünler</h1>
+      <form method="get" action="/products" class="list" style="margin-top:12px">
+        <div class="row">
+          <input name="q" value="{esc(q)}" placeholder="Ara: örn. stand, kablo, ps5..." />
+          <select name="cat">{options_cat}</select>
+          <select name="mat">{options_mat}</select>
+        </div>
+        <div class="row">
+          <button class="btn primary" type="submit">Filtrele</button>
+          <a class="btn" href="/products">Sıfırla</a>
+          {"<a class='btn' href='/admin'>Panel</a>" if is_admin else ""}
+        </div>
+      </form>
+      <div class="list" style="margin-top:14px">
+    """
+    tail = """
+      </div>
+    </div>
+    """
+
+    if len(rows) > STREAM_ROW_THRESHOLD:
+        # Büyük katalog: tek dev string kurmak yerine satır satır akıt
+        def body_parts():
+            yield head
+            for p in rows:
+                yield _PRODUCT_ROW_TMPL.render(p=p, buy_link=whatsapp_buy_link(p) if wa else "", is_admin=is_admin)
+            yield tail
+        return page_stream("Ürünler", body_parts())
+
+    items = "".join([
+        _PRODUCT_ROW_TMPL.render(p=p, buy_link=whatsapp_buy_link(p) if wa else "", is_admin=is_admin)
+        for p in rows
+    ])
+    body = head + (items if items else "<p class='sub'>Ürün bulunamadı.</p>") + tail
+    return page("Ürünler", body)
+
+@app.get("/vision")
+def vision():
+    body = """
+    <div class="card">
+      <h1>Vizyon & Misyon</h1>
+      <div class="grid" style="margin-top:10px">
+        <div class="card">
+          <h2>Vizyon</h2>
+          <p>Kullanışlı, estetik ve dayanıklı 3D baskı ürünleriyle çözüm sunmak.</p>
+        </div>
+        <div class="card">
+          <h2>Misyon</h2>
+          <p>Hızlı prototipleme ve üretim ile standlar, düzenleyiciler, aksesuarlar üretmek.</p>
+          <p class="sub">PLA / PETG / TPU gibi malzemelerle ihtiyaca göre üretim.</p>
+        </div>
+      </div>
+    </div>
+    """
+    return static_page("Vizyon & Misyon", body)
+
+@app.get("/contact")
+def contact():
+    body = """
+    <div class="grid">
+      <div class="card">
+        <h1>İletişim</h1>
+        <p>Özel tasarım veya sipariş için mesaj bırak.</p>
+        <form method="post" action="/contact/send" class="list" style="margin-top:12px">
+          <div class="row">
+            <input name="name" placeholder="Ad Soyad" required />
+            <input name="email" placeholder="E-posta" required />
+          </div>
+          <textarea name="msg" rows="5" placeholder="İstediğin ürün / ölçü / renk / adet..." required></textarea>
+          <button class="btn primary" type="submit">Gönder</button>
+        </form>
+      </div>
+      <div class="card">
+        <h2>Bilgi</h2>
+        <p class="sub">Mesajlar yönetim panelinde listelenir.</p>
+      </div>
+    </div>
+    """
+    return static_page("İletişim", body)
+
+# Mesaj yazma kuyruğu: kullanıcı yanıtı INSERT+commit'i beklemesin.
+# Kuyruk (op, payload) taşır: ("insert", (name, email, msg)),
+# ("read", [id, ...]) veya ("delete", [id, ...]). Arka plan thread'i
+# kuyruğu boşaltıp aynı türden işleri tek transaction'da toplar.
+_MSG_QUEUE = queue.Queue(maxsize=1000)
+_msg_writer_lock = threading.Lock()
+_msg_writer_started = False
+
+def _msg_writer_loop():
+    while True:
+        batch = [_MSG_QUEUE.get()]
+        while len(batch) < 100:
+            try:
+                batch.append(_MSG_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        inserts = [payload for op, payload in batch if op == "insert"]
+        read_ids = [i for op, payload in batch if op == "read" for i in payload]
+        del_ids = [i for op, payload in batch if op == "delete" for i in payload]
+        try:
+            db = _get_pool().getconn()
+            try:
+                # RETURNING ile okunmamış satıra dokunulup dokunulmadığını
+                # aynı round-trip'te öğren; dokunulmadıysa cache taze kalır
+                touched_unread = bool(inserts)
+                with db.cursor() as cur:
+                    if inserts:
+                        execute_values(cur, "INSERT INTO messages(name, email, message) VALUES %s", inserts)
+                    # Burada prepared kullanma: transaction ortasında
+                    # InvalidSqlStatementName tüm batch'i iptal ederdi
+                    if read_ids:
+                        cur.execute("UPDATE messages SET is_read=TRUE WHERE id = ANY(%s) AND is_read=FALSE RETURNING id", (read_ids,))
+                        touched_unread = touched_unread or cur.fetchone() is not None
+                    if del_ids:
+                        cur.execute("DELETE FROM messages WHERE id = ANY(%s) RETURNING is_read", (del_ids,))
+                        touched_unread = touched_unread or any(not r[0] for r in cur.fetchall())
+                db.commit()
+                if touched_unread:
+                    invalidate_unread_cache()
+            finally:
+                _get_pool().putconn(db)
+        except Exception:
+            log.exception("Mesaj yazma hatası")
+        finally:
+            for _ in batch:
+                _MSG_QUEUE.task_done()
+
+def _start_msg_writer():
+    global _msg_writer_started
+    if _msg_writer_started:
+        return
+    with _msg_writer_lock:
+        if not _msg_writer_started:
+            threading.Thread(target=_msg_writer_loop, daemon=True, name="msg-writer").start()
+            _msg_writer_started = True
+
+@app.post("/contact/send")
+def contact_send():
+    name = (request.form.get("name") or "").strip()
+    email = (request.form.get("email") or "").strip()
+    msg = (request.form.get("msg") or "").strip()
+
+    if not (name and email and msg):
+        return page("Hata", '<div class="card"><div class="msg">Lütfen tüm alanları doldur.</div><a class="btn primary" href="/contact">Geri dön</a></div>')
+
+    _start_msg_writer()
+    try:
+        _MSG_QUEUE.put_nowait(("insert", (name, email, msg)))
+    except queue.Full:
+        # Kuyruk doluysa geri bas: senkron yaz, mesaj kaybolmasın
+        db = get_db()
+        with db.cursor() as cur:
+            cur.execute("INSERT INTO messages(name, email, message) VALUES(%s,%s,%s)", (name, email, msg))
+        invalidate_unread_cache()
+
+    return page("Gönderildi", '<div class="card"><h1>Mesaj alındı</h1><p class="sub">En kısa sürede dönüş yapılacak.</p><a class="btn primary" href="/">Ana sayfaya dön</a></div>')
+
+@app.get("/login")
+def login():
+    body = """
+    <div class="card" style="max-width:520px">
+      <h1>Yönetim Giriş</h1>
+      <form method="post" action="/login" class="list" style="margin-top:12px">
+        <input name="username" placeholder="Kullanıcı adı" required />
+        <input name="password" type="password" placeholder="Şifre" required />
+        <button class="btn primary" type="submit">Giriş</button>
+      </form>
+    </div>
+    """
+    return static_page("Giriş", body)
+
+@app.post("/login")
+def login_post():
+    u = (request.form.get("username") or "").strip()
+    p = (request.form.get("password") or "")
+    if u == ADMIN_USER and p == ADMIN_PASS:
+        session["is_admin"] = True
+        return redirect_to("admin")
+    return page("Hata", '<div class="card" style="max-width:520px"><div class="msg">Kullanıcı adı veya şifre yanlış.</div><a class="btn primary" href="/login">Tekrar dene</a></div>')
+
+@app.get("/logout")
+def logout():
+    session.clear()
+    return redirect_to("home")
+
+@app.get("/admin")
+def admin():
+    r = require_admin()
+    if r: return r
+    unread = count_unread_messages()
+    body = f"""
+    <div class="grid">
+      <div class="card">
+        <h1>Panel</h1>
+        <div class="list" style="margin-top:12px">
+          <div class="item">
+            <div class="meta"><b>Ürün yönetimi</b><div class="sub">Ürün ekle / düzenle</div></div>
+            <a class="btn primary" href="/admin/products">Ürünler</a>
+          </div>
+          <div class="item">
+            <div class="meta"><b>Mesajlar</b><div class="sub">{unread} okunmamış mesaj</div></div>
+            <a class="btn primary" href="/admin/messages">Mesajlar</a>
+          </div>
+        </div>
+      </div>
+      <div class="card">
+        <h2>Durum</h2>
+        <div class="kpi">
+          <span class="pill">Okunmamış: {unread}</span>
+          <span class="pill">WhatsApp: {"Ayarlı" if WHATSAPP_NUMBER else "Kapalı"}</span>
+          <span class="pill">DB: PostgreSQL</span>
+        </div>
+      </div>
+    </div>
+    """
+    return page("Panel", body)
+
+@app.get("/admin/products")
+def admin_products():
+    r = require_admin()
+    if r: return r
+
+    rows = fetch_products()
+    items = "".join([_ADMIN_PRODUCT_ROW_TMPL.render(p=p, tok=form_token()) for p in rows])
+
+    body = f"""
+    <div class="grid">
+      <div class="card">
+        <h1>Ürün Yönetimi</h1>
+        <form method="post" action="/admin/add" class="list" style="margin-top:12px">
+          <input name="name" placeholder="Ürün adı" required />
+          <div class="row">
+            <input name="category" placeholder="Kategori" required />
+            <select name="material" required>
+              <option value="PLA">PLA</option><option value="PETG">PETG</option><option value="TPU">TPU</option>
+              <option value="ABS">ABS</option><option value="Diğer">Diğer</option>
+            </select>
+          </div>
+          <div class="row">
+            <input name="price" type="number" min="0" step="1" placeholder="Fiyat (TL)" required />
+            <input name="stock" type="number" min="0" step="1" placeholder="Stok" required />
+          </div>
+          <div class="row">
+            <input name="lead_time_days" type="number" min="0" step="1" placeholder="Üretim süresi (gün)" required />
+            <input name="photo_url" placeholder="Foto linki (opsiyonel)" />
+          </div>
+          <input name="stl_url" placeholder="STL linki (opsiyonel)" />
+          <button class="btn primary" type="submit">Ekle</button>
+        </form>
+        <div class="hr"></div>
+        <div class="actions" style="justify-content:flex-start">
+          <a class="btn" href="/products">Kataloğu aç</a>
+          <a class="btn" href="/admin">Panele dön</a>
+        </div>
+      </div>
+      <div class="card">
+        <h2>Mevcut Ürünler</h2>
+        <div class="list" style="margin-top:10px">
+          {items if items else "<p class='sub'>Ürün yok.</p>"}
+        </div>
+      </div>
+    </div>
+    """
+    return page("Ürün Yönetimi", body)
+
+@app.post("/admin/add")
+def admin_add():
+    r = require_admin()
+    if r: return r
+
+    name = (request.form.get("name") or "").strip()
+    category = (request.form.get("category") or "").strip()
+    material = (request.form.get("material") or "").strip()
+    price = safe_int(request.form.get("price"), 0, 0)
+    stock = safe_int(request.form.get("stock"), 0, 0)
+    lead = safe_int(request.form.get("lead_time_days"), 1, 0)
+    photo_url = (request.form.get("photo_url") or "").strip()
+    stl_url = (request.form.get("stl_url") or "").strip()
+
+    if not (name and category and material):
+        return redirect_to("admin_products")
+
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("""
+            INSERT INTO products(name, category, material, price, stock, lead_time_days, photo_url, stl_url)
+            VALUES(%s,%s,%s,%s,%s,%s,%s,%s)
+        """, (name, category, material, price, stock, lead, photo_url, stl_url))
+    invalidate_filter_cache()
+    return redirect_to("admin_products")
+
+@app.post("/admin/delete")
+def admin_delete():
+    r = require_admin()
+    if r: return r
+
+    if token_replayed(request.form.get("tok")):
+        return redirect_to("admin_products")
+    pid = safe_int(request.form.get("id"), 0, 0)
+    if pid <= 0:
+        # Bozuk/boş id ile DB'ye hiç gitme; sorgu zaten boş dönecekti
+        return redirect_to("admin_products")
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("DELETE FROM products WHERE id=%s", (pid,))
+    invalidate_filter_cache()
+    return redirect_to("admin_products")
+
+@app.get("/admin/edit/<int:pid>")
+def admin_edit(pid: int):
+    r = require_admin()
+    if r: return r
+    p = fetch_product(pid)
+    if not p:
+        return page("Düzenle", '<div class="card"><div class="msg">Ürün bulunamadı.</div><a class="btn primary" href="/admin/products">Geri dön</a></div>')
+
+    def mat_opts(sel):
+        opts = ["PLA","PETG","TPU","ABS","Diğer"]
+        return "".join([f'<option value="{esc(o)}" {"selected" if o==sel else ""}>{esc(o)}</option>' for o in opts])
+
+    body = f"""
+    <div class="card" style="max-width: 760px">
+      <h1>Ürün Düzenle</h1>
+      <p class="sub">#{p.id}</p>
+      <form method="post" action="/admin/edit/{p.id}" class="list" style="margin-top:12px">
+        <input name="name" value="{esc(p.name)}" required />
+        <div class="row">
+          <input name="category" value="{esc(p.category)}" required />
+          <select name="material" required>{mat_opts(p.material or "")}</select>
+        </div>
+        <div class="row">
+          <input name="price" type="number" min="0" step="1" value="{p.price}" required />
+          <input name="stock" type="number" min="0" step="1" value="{p.stock}" required />
+        </div>
+        <div class="row">
+          <input name="lead_time_days" type="number" min="0" step="1" value="{p.lead_time_days}" required />
+          <input name="photo_url" value="{esc(p.photo_url or "")}" />
+        </div>
+        <input name="stl_url" value="{esc(p.stl_url or "")}" />
+        <div class="row">
+          <button class="btn primary" type="submit">Kaydet</button>
+          <a class="btn" href="/admin/products">İptal</a>
+        </div>
+      </form>
+    </div>
+    """
+    return page("Düzenle", body)
+
+@app.post("/admin/edit/<int:pid>")
+def admin_edit_post(pid: int):
+    r = require_admin()
+    if r: return r
+
+    name = (request.form.get("name") or "").strip()
+    category = (request.form.get("category") or "").strip()
+    material = (request.form.get("material") or "").strip()
+    price = safe_int(request.form.get("price"), 0, 0)
+    stock = safe_int(request.form.get("stock"), 0, 0)
+    lead = safe_int(request.form.get("lead_time_days"), 1, 0)
+    photo_url = (request.form.get("photo_url") or "").strip()
+    stl_url = (request.form.get("stl_url") or "").strip()
+
+    if not (name and category and material):
+        return redirect(url_for("admin_edit", pid=pid))
+
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("""
+            UPDATE products
+            SET name=%s, category=%s, material=%s, price=%s, stock=%s, lead_time_days=%s, photo_url=%s, stl_url=%s
+            WHERE id=%s
+            RETURNING id
+        """, (name, category, material, price, stock, lead, photo_url, stl_url, pid))
+        if cur.fetchone() is None:
+            db.rollback()
+            return redirect_to("admin_products")
+    invalidate_filter_cache()
+    return redirect_to("admin_products")
+
+# Mesajlar gövdesi derlenmiş Jinja parçası: parse bir kez import'ta olur,
+# istek başına sadece doldurma kalır; escape'i autoescape halleder
+_MESSAGES_BODY_TMPL = app.jinja_env.from_string("""
+    <div class="card">
+      <h1>Mesajlar</h1>
+      <p class="sub">{{ unread }} okunmamış mesaj</p>
+      <div class="actions" style="justify-content:flex-start; margin-top:10px">
+        <a class="btn" href="/admin">Panele dön</a>
+        <a class="btn" href="/admin/products">Ürünler</a>
+      </div>
+      <form method="post" class="list" style="margin-top:14px">
+        <input type="hidden" name="tok" value="{{ tok }}" />
+        {% for m in messages %}
+        <div class="item">
+          <div class="meta">
+            <b>{{ m.name }}</b> <span class="pill">{{ "Okundu" if m.is_read else "Yeni" }}</span>
+            <div class="sub">{{ m.email }} • {{ m.created_at }}</div>
+            <div class="sub" style="margin-top:6px; white-space:pre-wrap">{{ m.message }}</div>
+          </div>
+          <div class="actions">
+            <input type="checkbox" name="id" value="{{ m.id }}" style="width:18px; height:18px" />
+          </div>
+        </div>
+        {% else %}
+        <p class='sub'>Mesaj yok.</p>
+        {% endfor %}
+        <div class="actions" style="justify-content:flex-start">
+          <button class="btn ok" type="submit" formaction="/admin/messages/read">Seçilenleri okundu say</button>
+          <button class="btn danger" type="submit" formaction="/admin/messages/delete">Seçilenleri sil</button>
+          <button class="btn" type="submit" formaction="/admin/messages/read_all">Tümünü okundu say</button>
+          <button class="btn danger" type="submit" formaction="/admin/messages/purge_read">Okunanları temizle</button>
+        </div>
+      </form>
+    </div>
+""")
+
+@app.get("/admin/messages")
+def admin_messages():
+    r = require_admin()
+    if r: return r
+
+    # Kuyrukta bekleyen yazımlar listeye yansısın (redirect sonrası okuma);
+    # writer daemon döngüsü her işte task_done çağırır, join askıda kalmaz
+    _MSG_QUEUE.join()
+
+    rows = fetch_messages()
+    unread = count_unread_messages()
+    tok = form_token()
+
+    if len(rows) > STREAM_ROW_THRESHOLD:
+        # Kalabalık kutu: gövdeyi tek string'e toplamadan akıt (katalogdaki
+        # page_stream deseni; akıtılan sayfa gzip/ETag almaz, bkz. page_stream).
+        # enable_buffering, Jinja'nın düğüm başına ürettiği minik parçaları
+        # makul boyutlu yazmalarda toplar
+        stream = _MESSAGES_BODY_TMPL.stream(unread=unread, messages=rows, tok=tok)
+        stream.enable_buffering(40)
+        return page_stream("Mesajlar", stream)
+
+    body = _MESSAGES_BODY_TMPL.render(unread=unread, messages=rows, tok=tok)
+    return page("Mesajlar", body)
+
+def _form_message_ids():
+    ids = [safe_int(x, 0, 0) for x in request.form.getlist("id")]
+    return [i for i in ids if i > 0]
+
+@app.post("/admin/messages/read")
+def admin_message_read():
+    r = require_admin()
+    if r: return r
+    if token_replayed(request.form.get("tok")):
+        return redirect_to("admin_messages")
+    ids = _form_message_ids()
+    if ids:
+        _start_msg_writer()
+        try:
+            _MSG_QUEUE.put_nowait(("read", ids))
+        except queue.Full:
+            db = get_db()
+            with db.cursor() as cur:
+                _execute_prepared(cur, "p_msgs_mark_read",
+                    "PREPARE p_msgs_mark_read (int[]) AS UPDATE messages SET is_read=TRUE WHERE id = ANY($1) AND is_read=FALSE RETURNING id;",
+                    (ids,))
+                if cur.fetchone() is not None:
+                    invalidate_unread_cache()
+    return redirect_to("admin_messages")
+
+@app.post("/admin/messages/read_all")
+def admin_message_read_all():
+    r = require_admin()
+    if r: return r
+    if token_replayed(request.form.get("tok")):
+        return redirect_to("admin_messages")
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("UPDATE messages SET is_read=TRUE WHERE is_read=FALSE")
+        if cur.rowcount:
+            invalidate_unread_cache()
+    return redirect_to("admin_messages")
+
+@app.post("/admin/messages/delete")
+def admin_message_delete():
+    r = require_admin()
+    if r: return r
+    if token_replayed(request.form.get("tok")):
+        return redirect_to("admin_messages")
+    ids = _form_message_ids()
+    if ids:
+        _start_msg_writer()
+        try:
+            _MSG_QUEUE.put_nowait(("delete", ids))
+        except queue.Full:
+            db = get_db()
+            with db.cursor() as cur:
+                _execute_prepared(cur, "p_msgs_delete",
+                    "PREPARE p_msgs_delete (int[]) AS DELETE FROM messages WHERE id = ANY($1) RETURNING is_read;",
+                    (ids,))
+                if any(not r[0] for r in cur.fetchall()):
+                    invalidate_unread_cache()
+    return redirect_to("admin_messages")
+
+@app.post("/admin/messages/purge_read")
+def admin_message_purge_read():
+    r = require_admin()
+    if r: return r
+    if token_replayed(request.form.get("tok")):
+        return redirect_to("admin_messages")
+    # Okunanları 500'lük partiler halinde sil: autocommit'te her parti
+    # ayrı commit olur, büyük temizlikte kilit penceresi kısa kalır
+    db = get_db()
+    with db.cursor() as cur:
+        while True:
+            cur.execute("DELETE FROM messages WHERE id IN (SELECT id FROM messages WHERE is_read=TRUE LIMIT 500)")
+            if cur.rowcount < 500:
+                break
+    return redirect_to("admin_messages")
+
+# Import sırasında hazırla (gunicorn worker'ları modülü yükleyince çalışır);
+# DATABASE_URL yoksa (örn. lokal araçlar) import'u patlatma
+if get_database_url():
+    ensure_schema()
+
+# Sadece lokal geliştirme; prod Render'da gunicorn ile çalışır (gunicorn.conf.py)
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", "5000"))
+    app.run(host="0.0.0.0", port=port, debug=os.environ.get("FLASK_DEBUG") == "1")
+
@@ -0,0 +1,11 @@
+import os
+
+# "gunicorn app:app" bu dosyayı otomatik okur (Render startCommand dahil).
+worker_class = "gevent"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", "1000"))
+
+def post_fork(server, worker):
+    # psycopg2'yi greenlet-uyumlu yap; yoksa DB beklerken worker komple bloklanır
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()